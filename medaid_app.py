@@ -1,9 +1,20 @@
 import os
-import json
-from flask import Flask, render_template_string, request, jsonify
+import re
+import functools
+import shutil
+import threading
+from collections import deque
+from flask import Flask, request, jsonify
 import openai
+import orjson
+import numpy as np
 import pandas as pd
 
+try:
+    import ahocorasick_rs
+except ImportError:  # Optional: fall back to plain substring scans
+    ahocorasick_rs = None
+
 app = Flask(__name__)
 app.secret_key = os.getenv("MEDIAID_SECRET", "mediaid-hackathon")
 
@@ -30,57 +41,182 @@ CONDITIONS = [
 ]
 
 SEVERITY_DISPLAY = {
-    "Mild": {"color": "green", "icon": "🏠", "desc": "Home care"},
-    "Moderate": {"color": "yellow", "icon": "🩺", "desc": "See a doctor soon"},
-    "Severe": {"color": "red", "icon": "🚑", "desc": "Emergency (ER)"}
+    "Mild": {"color": "green", "icon": "🏠", "desc": "Home care", "gradient": "#bbf7d0"},
+    "Moderate": {"color": "yellow", "icon": "🩺", "desc": "See a doctor soon", "gradient": "#fef08a"},
+    "Severe": {"color": "red", "icon": "🚑", "desc": "Emergency (ER)", "gradient": "#fecaca"}
 }
 
-HISTORY_FILE = "mediaid_history.json"
+HISTORY_FILE = "mediaid_history.jsonl"  # JSON Lines: one entry per line, append-only
+LEGACY_HISTORY_FILE = "mediaid_history.json"  # Old format: a single JSON array, migrated at startup
+HISTORY_BUFFER_SIZE = 65536
+RECENT_HISTORY_SIZE = 5  # Entries shown on the home page
+MAX_HISTORY = 10_000  # Entries kept in the history file
+HISTORY_COMPACT_EVERY = 1024  # Appends between trims of the history file
 DATASET_FILE = "symptoms_diseases.csv"  # You need to provide this file (see below)
+RISK_PRIORITY = {"Severe": 3, "Moderate": 2, "Mild": 1}
+RISK_LEVELS = ["Mild", "Moderate", "Severe"]  # Ascending, so category codes rank risk
+TRIAGE_CACHE_SIZE = 4096  # Exact-match cache of preprocessed symptom strings
+
+# Semantic cache for LLM answers: normalized symptom embeddings (float16) and the
+# matching (severity, advice, disease) results, row for row, in one .npz file
+LLM_CACHE_FILE = "mediaid_llm_cache.npz"
+LLM_CACHE_MAX_ROWS = 2000  # Oldest answers are evicted beyond this
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_THRESHOLD = 0.92  # Cosine similarity needed to reuse an answer
+# "Severity: ...", "Advice: ...", "Disease: ..." lines of the LLM response
+LLM_FIELD_RE = re.compile(r"^(severity|advice|disease)[ \t]*:(.*)$", re.IGNORECASE | re.MULTILINE)
+LLM_LAST_FIELD_RE = re.compile(r"^disease[ \t]*:.*\n", re.IGNORECASE | re.MULTILINE)
 
 # Load dataset if available
 # Example: Dataset should have columns: "symptom", "disease", "risk_level"
 def load_dataset():
     if os.path.exists(DATASET_FILE):
-        df = pd.read_csv(DATASET_FILE)
+        df = pd.read_csv(DATASET_FILE, engine="pyarrow", dtype_backend="pyarrow")
         # Clean columns for matching
         df["symptom"] = df["symptom"].str.lower().str.strip()
         df["disease"] = df["disease"].str.strip()
-        df["risk_level"] = df["risk_level"].str.strip().str.title()
+        # Ordered categorical: the integer codes rank risk
+        df["risk_level"] = pd.Categorical(df["risk_level"].str.strip().str.title(), categories=RISK_LEVELS, ordered=True)
+        # Unknown risk levels become NaN and have no display entry, so drop those rows
+        df = df[df["risk_level"].notna()]
+        # Blank symptoms would match every input and cannot be automaton patterns
+        df = df[df["symptom"].fillna("") != ""]
         return df
     return None
 
 symptoms_df = load_dataset()
+# Plain NumPy columns for the per-request path, so matching never builds pandas objects
+if symptoms_df is not None:
+    SYMPTOMS_ARR = symptoms_df["symptom"].to_numpy()
+    DISEASES_ARR = symptoms_df["disease"].to_numpy()
+    RISK_LEVELS_ARR = symptoms_df["risk_level"].to_numpy()
+    RISK_CODES_ARR = symptoms_df["risk_level"].cat.codes.to_numpy()
+    RISK_CODES_LIST = RISK_CODES_ARR.tolist()  # Python ints for the fallback loop
+else:
+    SYMPTOMS_ARR = DISEASES_ARR = RISK_LEVELS_ARR = RISK_CODES_ARR = RISK_CODES_LIST = None
+
+# Multi-pattern matchers: one linear scan over the symptoms text finds every
+# keyword/symptom it contains. Pattern ids index into the tables they were built from.
+def build_matcher(patterns):
+    if ahocorasick_rs is None or len(patterns) == 0:
+        return None
+    return ahocorasick_rs.AhoCorasick(list(patterns))
+
+def find_pattern_ids(matcher, symptoms_text):
+    # Overlapping matches so nested phrases ("severe headache"/"headache") all count
+    return [idx for idx, _, _ in matcher.find_matches_as_indexes(symptoms_text, overlapping=True)]
+
+# Flat (keyword, severity, advice) rules, most severe first, so the lowest
+# matching pattern id is always the answer
+FLAT_RULES = tuple(sorted(
+    ((kw, cond["severity"], cond["advice"]) for cond in CONDITIONS for kw in cond["keywords"]),
+    key=lambda rule: -RISK_PRIORITY[rule[1]],
+))
+RULE_AC = build_matcher([kw for kw, _, _ in FLAT_RULES])
+# Dataset pattern ids are row positions, so hits index the NumPy columns directly
+DATASET_AC = build_matcher(SYMPTOMS_ARR) if SYMPTOMS_ARR is not None else None
 
 def preprocess(text):
+    # str.lower already takes an ASCII fast path; a bytes.translate round-trip is slower
     return text.lower().strip()
 
 def dataset_match(symptoms_text):
     if symptoms_df is None:
         return None
-    # Try to match any symptom phrase from dataset
-    matches = []
-    for _, row in symptoms_df.iterrows():
-        if row["symptom"] in symptoms_text:
-            matches.append(row)
-    if not matches:
-        return None
-    # Take highest risk level if multiple match
-    risk_priority = {"Severe": 3, "Moderate": 2, "Mild": 1}
-    best = max(matches, key=lambda row: risk_priority.get(row["risk_level"], 0))
+    # Try to match any symptom phrase from dataset in one pass over the column
+    if DATASET_AC is not None:
+        rows = np.unique(find_pattern_ids(DATASET_AC, symptoms_text))
+        if not len(rows):
+            return None
+        # Take highest risk level if multiple match (first row wins ties)
+        best = rows[RISK_CODES_ARR[rows].argmax()]
+    else:
+        # Only rows that would beat the current best need a substring check,
+        # and the first Severe match ends the scan
+        best, best_code = None, -1
+        for row, (sym, code) in enumerate(zip(SYMPTOMS_ARR, RISK_CODES_LIST)):
+            if code > best_code and sym in symptoms_text:
+                best, best_code = row, code
+                if code == len(RISK_LEVELS) - 1:
+                    break
+        if best is None:
+            return None
+    disease = DISEASES_ARR[best]
     return {
-        "disease": best["disease"],
-        "severity": best["risk_level"],
-        "advice": f"Possible: {best['disease']}. Please consult a doctor for proper diagnosis."
+        "disease": disease,
+        "severity": RISK_LEVELS_ARR[best],
+        "advice": f"Possible: {disease}. Please consult a doctor for proper diagnosis."
     }
 
 def rule_based_triage(symptoms_text):
-    for cond in CONDITIONS:
-        for kw in cond["keywords"]:
-            if kw in symptoms_text:
-                return cond["severity"], cond["advice"]
+    if RULE_AC is not None:
+        hits = find_pattern_ids(RULE_AC, symptoms_text)
+        if hits:
+            _, severity, advice = FLAT_RULES[min(hits)]
+            return severity, advice
+        return "Mild", "Home care recommended. Rest, stay hydrated, and monitor symptoms."
+    # Without an automaton, a plain ordered scan: the first hit is the most severe
+    for kw, severity, advice in FLAT_RULES:
+        if kw in symptoms_text:
+            return severity, advice
     return "Mild", "Home care recommended. Rest, stay hydrated, and monitor symptoms."
 
+def load_llm_cache():
+    if not os.path.exists(LLM_CACHE_FILE):
+        return None, []
+    try:
+        with np.load(LLM_CACHE_FILE) as data:
+            # Stored as float16 on disk; upcast once so lookups stay on the float32 BLAS path
+            matrix = data["embeddings"].astype(np.float32)
+            results = [tuple(result) for result in orjson.loads(data["results"].tobytes())]
+    except Exception as e:
+        # A damaged cache only costs some LLM calls; start empty instead of failing to boot
+        print("LLM cache unreadable, starting empty:", e)
+        return None, []
+    n = min(len(matrix), len(results))
+    return matrix[:n], results[:n]
+
+# (matrix, results) is rebound as one tuple, so readers never see a half-updated pair
+llm_cache = load_llm_cache()
+llm_cache_lock = threading.Lock()
+
+def embed_symptoms(symptoms_text):
+    response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=symptoms_text)
+    emb = np.asarray(response.data[0].embedding, dtype=np.float32)
+    return emb / np.linalg.norm(emb)
+
+def semantic_cache_lookup(emb):
+    matrix, results = llm_cache
+    if matrix is None or not len(matrix):
+        return None
+    # Rows are unit vectors, so one matrix-vector product gives every cosine similarity
+    sims = matrix @ emb
+    best = int(sims.argmax())
+    if sims[best] > SEMANTIC_CACHE_THRESHOLD:
+        return results[best]
+    return None
+
+def semantic_cache_store(emb, result):
+    global llm_cache
+    with llm_cache_lock:
+        matrix, results = llm_cache
+        if matrix is None:
+            matrix, results = emb[np.newaxis, :], [result]
+        else:
+            keep = LLM_CACHE_MAX_ROWS - 1
+            matrix = np.vstack([matrix[-keep:], emb])
+            results = results[-keep:] + [result]
+        llm_cache = (matrix, results)
+        # Write a temp file and swap it in, so a crash never leaves a torn cache
+        tmp_file = LLM_CACHE_FILE + ".tmp"
+        with open(tmp_file, "wb") as f:
+            np.savez(
+                f,
+                embeddings=matrix.astype(np.float16),
+                results=np.frombuffer(orjson.dumps(results), dtype=np.uint8),
+            )
+        os.replace(tmp_file, LLM_CACHE_FILE)
+
 def llm_triage(symptoms_text):
     if not openai_client:
         return None
@@ -96,77 +232,137 @@ def llm_triage(symptoms_text):
         "Disease: [optional, if highly likely]\n"
     )
     try:
-        completion = openai_client.chat.completions.create(
+        emb = embed_symptoms(symptoms_text)
+        cached = semantic_cache_lookup(emb)
+        if cached:
+            return cached
+    except Exception as e:
+        # The cache is only a shortcut; go on to the completion without caching
+        print("Embedding error:", e)
+        emb = None
+    try:
+        text = ""
+        with openai_client.chat.completions.create(
             model="gpt-3.5-turbo",
-            messages=[{"role": "system", "content": prompt}]
-        )
-        text = completion.choices[0].message.content.strip()
+            messages=[{"role": "system", "content": prompt}],
+            stream=True
+        ) as stream:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    text += chunk.choices[0].delta.content
+                    # Disease is the last field, so close the stream once its line is complete
+                    if LLM_LAST_FIELD_RE.search(text):
+                        break
+        text = text.strip()
         # Parse result
-        severity = "Mild"
-        advice = ""
-        disease = ""
-        for line in text.splitlines():
-            if line.lower().startswith("severity:"):
-                val = line.split(":", 1)[-1].strip().title()
-                if val in SEVERITY_DISPLAY:
-                    severity = val
-            elif line.lower().startswith("advice:"):
-                advice = line.split(":", 1)[-1].strip()
-            elif line.lower().startswith("disease:"):
-                disease = line.split(":", 1)[-1].strip()
+        fields = {m.group(1).lower(): m.group(2).strip() for m in LLM_FIELD_RE.finditer(text)}
+        severity = fields.get("severity", "").title()
+        if severity not in SEVERITY_DISPLAY:
+            severity = "Mild"
+        advice = fields.get("advice", "")
+        disease = fields.get("disease", "")
+        if emb is not None:
+            semantic_cache_store(emb, (severity, advice, disease))
         return severity, advice, disease
     except Exception as e:
         print("LLM error:", e)
         return None
 
-def triage_symptoms(symptoms_text):
-    symptoms_text = preprocess(symptoms_text)
+class _NoTriageResult(Exception):
+    # Neither the dataset nor the LLM answered; raised so lru_cache stores nothing
+    pass
+
+@functools.lru_cache(maxsize=TRIAGE_CACHE_SIZE)
+def triage_cached(symptoms_text):
     # 1. Try dataset
     dataset_result = dataset_match(symptoms_text)
     if dataset_result:
         return dataset_result["severity"], dataset_result["advice"], dataset_result["disease"]
-    # 2. Try LLM
+    # 2. Try LLM (only on a dataset miss; every call is billed)
     llm_result = llm_triage(symptoms_text)
     if llm_result:
         severity, advice, disease = llm_result
         return severity, advice, disease
-    # 3. Fallback rule-based
-    severity, advice = rule_based_triage(symptoms_text)
-    return severity, advice, ""
+    # Raise instead of returning so lru_cache never pins a transient LLM failure
+    raise _NoTriageResult(symptoms_text)
 
-def save_history(entry):
-    if not os.path.exists(HISTORY_FILE):
-        history = []
-    else:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
-    history.append(entry)
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
+def triage_symptoms(symptoms_text):
+    symptoms_text = preprocess(symptoms_text)
+    try:
+        return triage_cached(symptoms_text)
+    except _NoTriageResult:
+        # 3. Fallback rule-based
+        severity, advice = rule_based_triage(symptoms_text)
+        return severity, advice, ""
 
 def load_history():
     if not os.path.exists(HISTORY_FILE):
         return []
-    with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(HISTORY_FILE, "rb", buffering=HISTORY_BUFFER_SIZE) as f:
+        return [orjson.loads(line) for line in f if line.strip()]
+
+def load_recent_history():
+    recent = deque(maxlen=RECENT_HISTORY_SIZE)
+    if os.path.exists(HISTORY_FILE):
+        # Only the last few lines are kept, and only those get parsed
+        with open(HISTORY_FILE, "rb", buffering=HISTORY_BUFFER_SIZE) as f:
+            lines = deque((line for line in f if line.strip()), maxlen=RECENT_HISTORY_SIZE)
+        recent.extend(orjson.loads(line) for line in lines)
+    return recent
+
+def compact_history():
+    # Keep only the newest MAX_HISTORY lines; write a temp file and swap it in atomically
+    with open(HISTORY_FILE, "rb", buffering=HISTORY_BUFFER_SIZE) as f:
+        lines = deque(f, maxlen=MAX_HISTORY)
+    tmp_file = HISTORY_FILE + ".tmp"
+    with open(tmp_file, "wb", buffering=HISTORY_BUFFER_SIZE) as f:
+        f.writelines(lines)
+    os.replace(tmp_file, HISTORY_FILE)
 
-@app.route("/", methods=["GET", "POST"])
+def migrate_legacy_history():
+    # Old entries go first, ahead of anything already in the JSONL file
+    with open(LEGACY_HISTORY_FILE, "rb") as f:
+        entries = orjson.loads(f.read())
+    tmp_file = HISTORY_FILE + ".tmp"
+    with open(tmp_file, "wb", buffering=HISTORY_BUFFER_SIZE) as out:
+        out.writelines(orjson.dumps(entry) + b"\n" for entry in entries)
+        if os.path.exists(HISTORY_FILE):
+            with open(HISTORY_FILE, "rb") as f:
+                shutil.copyfileobj(f, out)
+    os.replace(tmp_file, HISTORY_FILE)
+    # Keep the original around instead of deleting it
+    os.replace(LEGACY_HISTORY_FILE, LEGACY_HISTORY_FILE + ".bak")
+
+if os.path.exists(LEGACY_HISTORY_FILE):
+    migrate_legacy_history()
+
+# Trim once at startup so the file stays bounded across restarts
+if os.path.exists(HISTORY_FILE):
+    compact_history()
+
+# This process is the only writer, so the home page's recent entries are read
+# once and then kept in sync; the full file is only read by /history
+recent_history = load_recent_history()
+history_writes = 0
+history_lock = threading.Lock()
+
+def save_history(entry):
+    global history_writes
+    with history_lock:
+        recent_history.append(entry)
+        # Append a single line instead of rewriting the whole file
+        with open(HISTORY_FILE, "ab", buffering=HISTORY_BUFFER_SIZE) as f:
+            f.write(orjson.dumps(entry) + b"\n")
+        history_writes += 1
+        if history_writes % HISTORY_COMPACT_EVERY == 0:
+            compact_history()
+
+@app.route("/", methods=["GET"])
 def home():
-    triage_result = None
-    history = load_history()
-    if request.method == "POST":
-        symptoms = request.form.get("symptoms", "")
-        severity, advice, disease = triage_symptoms(symptoms)
-        entry = {
-            "symptoms": symptoms,
-            "severity": severity,
-            "advice": advice,
-            "disease": disease
-        }
-        save_history(entry)
-        triage_result = entry
-        history = load_history()
-    return render_template_string(TEMPLATE, triage_result=triage_result, history=history, severity_display=SEVERITY_DISPLAY)
+    # Static shell: results and recent history are fetched as JSON by the page
+    response = app.response_class(home_page, mimetype="text/html")
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return response
 
 @app.route("/triage", methods=["POST"])
 def triage_api():
@@ -182,10 +378,14 @@ def triage_api():
     save_history(entry)
     return jsonify(entry)
 
+@app.route("/history/recent")
+def recent_history_api():
+    return jsonify(list(recent_history))
+
 @app.route("/history")
 def history():
     history = load_history()
-    return render_template_string(HISTORY_TEMPLATE, history=history, severity_display=SEVERITY_DISPLAY)
+    return history_template.render(history=history, severity_display=SEVERITY_DISPLAY)
 
 TEMPLATE = """
 <!DOCTYPE html>
@@ -204,23 +404,22 @@ TEMPLATE = """
     </div>
     <div class="bg-white rounded-xl shadow-xl p-8 mb-6">
       <h2 class="text-2xl font-bold mb-3">AI Symptom Triage</h2>
-      <form method="POST" class="flex flex-col gap-4">
+      <form id="triage-form" class="flex flex-col gap-4">
         <textarea name="symptoms" placeholder="Describe your symptoms, e.g. 'fever and cough for 3 days'" required class="w-full h-24 p-3 rounded-lg border focus:ring-2 focus:ring-blue-500 outline-none"></textarea>
         <button class="px-6 py-3 bg-gradient-to-r from-green-500 to-blue-500 text-white rounded-lg font-bold hover:from-green-600 hover:to-blue-600">Check Severity</button>
       </form>
-      {% if triage_result %}
-      <div class="mt-8 p-6 rounded-xl shadow-lg border flex flex-col gap-2" style="background: linear-gradient(90deg, {% if severity_display[triage_result.severity].color == 'green' %}#bbf7d0{% elif severity_display[triage_result.severity].color == 'yellow' %}#fef08a{% else %}#fecaca{% endif %}, #fff);">
+      <div id="triage-result" class="hidden mt-8 p-6 rounded-xl shadow-lg border flex flex-col gap-2">
         <div class="flex items-center gap-3 text-xl font-bold">
-          <span class="text-2xl">{{ severity_display[triage_result.severity].icon }}</span>
+          <span id="result-icon" class="text-2xl"></span>
           <span class="text-gray-700">Severity: </span>
-          <span class="text-{{ severity_display[triage_result.severity].color }}-700">{{ triage_result.severity }}</span>
+          <span id="result-severity"></span>
         </div>
-        {% if triage_result.disease %}
-        <div class="text-lg text-gray-800"><b>Possible Disease:</b> {{ triage_result.disease }}</div>
-        {% endif %}
-        <div class="text-lg text-gray-800"><b>Advice:</b> {{ triage_result.advice }}</div>
+        <div id="result-disease-row" class="text-lg text-gray-800"><b>Possible Disease:</b> <span id="result-disease"></span></div>
+        <div class="text-lg text-gray-800"><b>Advice:</b> <span id="result-advice"></span></div>
+      </div>
+      <div id="triage-error" class="hidden mt-8 p-4 rounded-xl border border-red-200 bg-red-50 text-red-700">
+        Could not check your symptoms right now. Please try again.
       </div>
-      {% endif %}
       <div class="mt-6 text-sm text-gray-500">
         ⚠️ Not medical advice. Always consult a doctor.
       </div>
@@ -230,24 +429,117 @@ TEMPLATE = """
         <h3 class="text-lg font-bold">Past Triage History</h3>
         <a href="/history" class="text-blue-500 hover:underline text-sm">Full History</a>
       </div>
-      <div class="max-h-48 overflow-y-auto">
-      {% for h in history[-5:] %}
-        <div class="flex gap-3 mb-2 items-start">
-          <span class="mt-1 text-xl">{{ severity_display[h.severity].icon }}</span>
-          <div>
-            <div class="text-gray-700"><b>Symptoms:</b> {{ h.symptoms }}</div>
-            <div class="text-xs text-gray-400"><b>Severity:</b> {{ h.severity }} | <b>Advice:</b> {{ h.advice }}{% if h.disease %} | <b>Disease:</b> {{ h.disease }}{% endif %}</div>
-          </div>
-        </div>
-      {% else %}
+      <div id="recent-history" class="max-h-48 overflow-y-auto">
         <div class="text-gray-400">No triage history yet.</div>
-      {% endfor %}
       </div>
     </div>
     <div class="mt-10 text-xs text-gray-400 text-center">
       Built for the hackathon 🚀 | <a class="underline" href="/history">History</a>
     </div>
   </div>
+  <script>
+    const SEVERITY_DISPLAY = {{ severity_display|tojson }};
+    let recentHistory = [];
+
+    // Build nodes with textContent so symptom text is never parsed as HTML
+    function el(tag, className, text) {
+      const node = document.createElement(tag);
+      if (className) node.className = className;
+      if (text !== undefined) node.textContent = text;
+      return node;
+    }
+
+    function field(parent, label, value) {
+      parent.append(el("b", "", label + ":"), " " + value);
+    }
+
+    function renderHistory() {
+      const list = document.getElementById("recent-history");
+      list.replaceChildren();
+      if (!recentHistory.length) {
+        list.append(el("div", "text-gray-400", "No triage history yet."));
+        return;
+      }
+      for (const h of recentHistory) {
+        const row = el("div", "flex gap-3 mb-2 items-start");
+        const body = el("div");
+        const symptoms = el("div", "text-gray-700");
+        field(symptoms, "Symptoms", h.symptoms);
+        const details = el("div", "text-xs text-gray-400");
+        field(details, "Severity", h.severity);
+        details.append(" | ");
+        field(details, "Advice", h.advice);
+        if (h.disease) {
+          details.append(" | ");
+          field(details, "Disease", h.disease);
+        }
+        body.append(symptoms, details);
+        row.append(el("span", "mt-1 text-xl", SEVERITY_DISPLAY[h.severity].icon), body);
+        list.append(row);
+      }
+    }
+
+    function showResult(entry) {
+      const display = SEVERITY_DISPLAY[entry.severity];
+      const result = document.getElementById("triage-result");
+      result.style.background = "linear-gradient(90deg, " + display.gradient + ", #fff)";
+      document.getElementById("result-icon").textContent = display.icon;
+      const severity = document.getElementById("result-severity");
+      severity.className = "text-" + display.color + "-700";
+      severity.textContent = entry.severity;
+      document.getElementById("result-disease-row").classList.toggle("hidden", !entry.disease);
+      document.getElementById("result-disease").textContent = entry.disease;
+      document.getElementById("result-advice").textContent = entry.advice;
+      result.classList.remove("hidden");
+    }
+
+    function showError() {
+      document.getElementById("triage-result").classList.add("hidden");
+      document.getElementById("triage-error").classList.remove("hidden");
+    }
+
+    document.getElementById("triage-form").addEventListener("submit", async (event) => {
+      event.preventDefault();
+      const symptoms = event.target.elements.symptoms.value;
+      let entry;
+      try {
+        const response = await fetch("/triage", {
+          method: "POST",
+          headers: {"Content-Type": "application/json"},
+          body: JSON.stringify({symptoms: symptoms})
+        });
+        if (!response.ok) throw new Error("Triage failed: " + response.status);
+        entry = await response.json();
+      } catch (error) {
+        showError();
+        return;
+      }
+      document.getElementById("triage-error").classList.add("hidden");
+      showResult(entry);
+      recentHistory = recentHistory.concat([entry]).slice(-{{ recent_history_size }});
+      renderHistory();
+    });
+
+    // Fetched entries predate anything submitted from this page, so put them
+    // in front rather than replacing results that arrived first
+    fetch("/history/recent")
+      .then((response) => {
+        if (!response.ok) throw new Error("History failed: " + response.status);
+        return response.json();
+      })
+      .then((entries) => {
+        recentHistory = entries.concat(recentHistory).slice(-{{ recent_history_size }});
+        renderHistory();
+      })
+      .catch(() => {
+        // Keep anything submitted from this page; only replace the empty placeholder
+        if (!recentHistory.length) {
+          document.getElementById("recent-history").replaceChildren(
+            el("div", "text-red-600", "Could not load triage history.")
+          );
+        }
+      });
+  </script>
 </body>
 </html>
 """
@@ -269,7 +561,7 @@ HISTORY_TEMPLATE = """
     </div>
     <div class="bg-white rounded-xl shadow-xl p-8">
       {% for h in history[::-1] %}
-        <div class="mb-5 p-4 rounded-xl shadow border flex gap-4" style="background: linear-gradient(90deg, {% if severity_display[h.severity].color == 'green' %}#bbf7d0{% elif severity_display[h.severity].color == 'yellow' %}#fef08a{% else %}#fecaca{% endif %}, #fff);">
+        <div class="mb-5 p-4 rounded-xl shadow border flex gap-4" style="background: linear-gradient(90deg, {{ severity_display[h.severity].gradient }}, #fff);">
           <span class="text-2xl">{{ severity_display[h.severity].icon }}</span>
           <div>
             <div><b>Symptoms:</b> {{ h.symptoms }}</div>
@@ -288,5 +580,11 @@ HISTORY_TEMPLATE = """
 </html>
 """
 
+# Compile once with the app's Jinja environment (keeps Flask's autoescaping)
+home_template = app.jinja_env.from_string(TEMPLATE)
+history_template = app.jinja_env.from_string(HISTORY_TEMPLATE)
+# The home page has no per-request data, so it is rendered once
+home_page = home_template.render(severity_display=SEVERITY_DISPLAY, recent_history_size=RECENT_HISTORY_SIZE)
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
\ No newline at end of file